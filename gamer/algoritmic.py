@@ -1,14 +1,27 @@
 
 import random as r
+from typing import Optional
 
 from snake.player import Player
-from snake.game import Position, SnakeStatus
+from snake.game import Position, SnakeStatus, pack
 
 class ShortPathPlayer(Player):
     """
     Define a player that prioritize short paths to apple.
     """
 
+    def __init__(self, seed:Optional[int]=None) -> 'ShortPathPlayer':
+        """
+        Create a new short path player.
+
+        Params
+        - seed: the seed used to break ties (random if not specified)
+
+        Return
+        - the new player
+        """
+        self._rng = r.Random(seed)
+
     def compute_move(self, status:SnakeStatus) -> int:
         """
         Compute the next move, given the current status of the game. Prioritize
@@ -21,20 +34,31 @@ class ShortPathPlayer(Player):
         Return
         - the direction of the movement
         """
-        cost = []
-        for dir in (Position.LEFT, Position.UP, Position.RIGHT, Position.DOWN):
-            snake_head = status.snake[-1]
-            next_pos = snake_head.move(dir)
-            if next_pos.is_out_of_bounds(status.bounds) or next_pos in status.snake:
-                cost.append((dir, 1))
+        best_cost = 2
+        best_dirs = []
+        head_x, head_y = status.snake[-1]
+        apple_x, apple_y = status.apple
+        head_dist = abs(head_x - apple_x) + abs(head_y - apple_y)
+        left, top, right, bottom = status.bounds
+        for dir, (dx, dy) in enumerate(Position.SHIFTS):
+            x, y = head_x + dx, head_y + dy
+            if not (left <= x <= right and bottom <= y <= top) or pack(x, y) in status.snake_set:
+                cost = 1
+            elif abs(x - apple_x) + abs(y - apple_y) >= head_dist:
+                cost = 0
             else:
-                if next_pos.distance(status.apple) >= snake_head.distance(status.apple):
-                    cost.append((dir, 0))
-                else:
-                    cost.append((dir, -1))
-        r.shuffle(cost)
-        cost.sort(key=lambda x:x[1])
-        return cost[0][0]
+                cost = -1
+
+            # Keep the directions with the lowest cost
+            if cost < best_cost:
+                best_cost = cost
+                best_dirs = [dir]
+            elif cost == best_cost:
+                best_dirs.append(dir)
+
+        if len(best_dirs) == 1:
+            return best_dirs[0]
+        return self._rng.choice(best_dirs)
 
 class BoringPathPlayer(Player):
     """
@@ -42,53 +66,73 @@ class BoringPathPlayer(Player):
     """
     def __init__(self, width, height) -> None:
         self.idx = -1
-        self.path = []
+        self.path = None
+        path = b""
 
         if width % 2 == 0:
             for i in range(width):
                 correction = 0 if i == 0 or i == width - 1 else -1
                 if i % 2 == 0:
-                    self.path += self.rep(Position.UP, height - 1 + correction)
+                    path += self.rep(Position.UP, height - 1 + correction)
                 else:
-                    self.path += self.rep(Position.DOWN, height - 1 + correction)
+                    path += self.rep(Position.DOWN, height - 1 + correction)
                 if i != width - 1:
-                    self.path += self.rep(Position.RIGHT, 1)
-            self.path += self.rep(Position.LEFT, width - 1)
+                    path += self.rep(Position.RIGHT, 1)
+            path += self.rep(Position.LEFT, width - 1)
 
         elif height % 2 == 0:
             for i in range(height):
                 correction = 0 if i == 0 or i == height - 1 else -1
                 if i % 2 == 0:
-                    self.path += self.rep(Position.RIGHT, width - 1 + correction)
+                    path += self.rep(Position.RIGHT, width - 1 + correction)
                 else:
-                    self.path += self.rep(Position.LEFT, width - 1 + correction)
+                    path += self.rep(Position.LEFT, width - 1 + correction)
                 if i != height - 1:
-                    self.path += self.rep(Position.UP, 1)
-            self.path += self.rep(Position.DOWN, width - 1)
+                    path += self.rep(Position.UP, 1)
+            path += self.rep(Position.DOWN, height - 1)
 
         else:
             raise Exception("Not implemented for odd width and height")
 
+        self._path_len = len(path)
+        self._origin_path = path
+
     def rep(self, dir, k):
-        return [dir for _ in range(k)]
+        return bytes([dir]) * k
+
+    def reset(self, status:SnakeStatus) -> None:
+        """
+        Prepare the player for a new game, rotating the path (which starts from
+        the origin) so that it starts from the initial head of the snake.
+
+        Params
+        - status: the initial status of the game
+        """
+        head = status.snake[-1]
+        pos = Position(0, 0)
+        for k in range(self._path_len):
+            if pos == head:
+                break
+            pos = pos.move(self._origin_path[k])
+        self.path = self._origin_path[k:] + self._origin_path[:k]
+        self.idx = -1
 
     def compute_move(self, status:SnakeStatus) -> int:
         """
-        Compute the next move, given the current status of the game. Prioritize
-        non-losing moves and then moves that bring the snake closer to the
-        apple. 
+        Compute the next move, given the current status of the game. Follow the
+        path, that must have been aligned to the snake with reset.
 
         Params
         - status: the current status of the game
 
         Return
         - the direction of the movement
+
+        Raise
+        - Exception: if reset has not been called before the first move
         """
-        if self.idx == -1:
-            if status.snake[-1].x > 0:
-                return Position.LEFT
-            if status.snake[-1].y > 0:
-                return Position.DOWN
-        self.idx = (self.idx + 1) % len(self.path)
+        if self.path is None:
+            raise Exception("reset must be called before the first move")
+        self.idx = (self.idx + 1) % self._path_len
         return self.path[self.idx]
 
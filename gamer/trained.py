@@ -1,8 +1,9 @@
 
-import pickle
+from   array import array
 from   pathlib import Path
 import random as r
-from   typing import Union
+import struct
+from   typing import Optional, Union
 
 from   snake.game import Position, SnakeStatus
 from   snake.player import TrainedPlayer
@@ -23,21 +24,42 @@ class ProximityPlayer(TrainedPlayer):
     """The reward associated to not-death and not-eating"""
     REWARD_APPLE = 100
     """The reward associated to eating"""
-
-    def __init__(self, radius:int, gamma:float) -> 'ProximityPlayer':
+    MOVES = {
+        (-1, 0): Position.LEFT,
+        (0, 1): Position.UP,
+        (1, 0): Position.RIGHT,
+        (0, -1): Position.DOWN,
+    }
+    """The direction corresponding to each horizontal and vertical shift"""
+    MODEL_HEADER = "<II"
+    """The header of a model file: number of maps and length of each map"""
+    MODEL_REWARDS = "<4i"
+    """The rewards of a map in a model file, one per direction"""
+
+    def __init__(self, radius:int, gamma:float, seed:Optional[int]=None) -> 'ProximityPlayer':
         """
         Create a new proximity player.
 
         Params
         - radius: the distance at which the player can see danger and apples
         - gamma: the discount factor
+        - seed: the seed used to break ties (random if not specified)
 
         Return
         - the new player
         """
         self.radius = radius
         self.gamma = gamma
-        self.exp_reward:dict[tuple[int], dict[int,int]] = {}
+        self._rng = r.Random(seed)
+        # Each map is associated with the expected reward of every direction,
+        # the maximum among them and the directions that reach the maximum
+        self.exp_reward:dict[bytes, list[Union[array, int, list[int]]]] = {}
+
+        # Runs of dangerous cells used to pad the parts of the proximity map
+        # that fall outside the board (index is the length of the run)
+        side = 2 * radius + 1
+        self._dangers = tuple(bytes([ProximityPlayer.MAP_DEATH]) * k for k in range(side + 1))
+        self._danger_row = self._dangers[side]
 
     def compute_move(self, status:SnakeStatus) -> int:
         """
@@ -49,16 +71,11 @@ class ProximityPlayer(TrainedPlayer):
         Return
         - the direction of the movement
         """
-        # Get the map
-        map = self._retrieve_proximity_map(status)
-        if map not in self.exp_reward:
-            self._add_map(map)
-
-        # Compute the max reward and corresponding directions
-        max_reward = max([self.exp_reward[map][dir] for dir in Position.DIRECTIONS])
-        dirs = [dir for dir in Position.DIRECTIONS if self.exp_reward[map][dir] == max_reward]
-
-        return r.choice(dirs)
+        # Choose among the directions with max reward
+        dirs = self._get_entry(self._retrieve_proximity_map(status))[2]
+        if len(dirs) == 1:
+            return dirs[0]
+        return self._rng.choice(dirs)
 
     def train(self, history:list[SnakeStatus]) -> None:
         """
@@ -67,20 +84,16 @@ class ProximityPlayer(TrainedPlayer):
         Params
         - history: the history of a game, to be used to train
         """
-        samples = self._history_to_samples(history)
-        for i in range(len(samples) - 1, -1, -1):
-            curr_map, next_map, move, reward = samples[i]
-
-            # Add maps to exp_reward
-            for map in [curr_map, next_map]:
-                if map not in self.exp_reward:
-                    self._add_map(map)
+        # Resolve every status to the entry of its map, so that each map is
+        # computed and hashed only once
+        entries = [self._get_entry(self._retrieve_proximity_map(status)) for status in history]
 
-            # Compute next max reward
-            next_max_reward = max([self.exp_reward[next_map][dir] for dir in Position.DIRECTIONS])
-
-            # Update reward
-            self.exp_reward[curr_map][move] = int(reward + self.gamma * next_max_reward)
+        # Walk the game backwards, so that rewards propagate from the end
+        gamma = self.gamma
+        for i in range(len(history) - 2, -1, -1):
+            move = self._retrieve_movement(history[i], history[i + 1])
+            reward = self._retrieve_reward(history[i], history[i + 1])
+            self._set_reward(entries[i], move, int(reward + gamma * entries[i + 1][1]))
 
     def save_model(self, filename:Union[str, Path]) -> None:
         """
@@ -92,8 +105,15 @@ class ProximityPlayer(TrainedPlayer):
         """
         if isinstance(filename, str):
             filename = Path(filename)
+
+        # Stream maps and rewards as two contiguous blocks, without building
+        # a copy of the whole model in memory
+        map_len = (2 * self.radius + 1) ** 2 + 2
         with open(filename, "wb") as f:
-            f.write(pickle.dumps(self.exp_reward))
+            f.write(struct.pack(ProximityPlayer.MODEL_HEADER, len(self.exp_reward), map_len))
+            f.writelines(self.exp_reward)
+            for entry in self.exp_reward.values():
+                f.write(struct.pack(ProximityPlayer.MODEL_REWARDS, *entry[0]))
 
     def load_model(self, filename:Union[str, Path]) -> None:
         """
@@ -102,51 +122,87 @@ class ProximityPlayer(TrainedPlayer):
 
         Params
         - filename: the name of the file where the model is saved
+
+        Raise
+        - Exception: if the file is not a valid model for the player radius
         """
         if isinstance(filename, str):
             filename = Path(filename)
-        with open(filename, "rb") as f:
-            self.exp_reward = pickle.loads(f.read())
 
-    def _add_map(self, map:tuple[int]) -> None:
+        with open(filename, "rb") as f:
+            header = f.read(struct.calcsize(ProximityPlayer.MODEL_HEADER))
+            if len(header) != struct.calcsize(ProximityPlayer.MODEL_HEADER):
+                raise Exception(f"{filename} is not a valid model")
+            count, map_len = struct.unpack(ProximityPlayer.MODEL_HEADER, header)
+            if map_len != (2 * self.radius + 1) ** 2 + 2:
+                raise Exception(f"{filename} is not a valid model for radius {self.radius}")
+            maps = f.read(count * map_len)
+            if len(maps) != count * map_len:
+                raise Exception(f"{filename} is not a valid model")
+            rewards = f.read(count * struct.calcsize(ProximityPlayer.MODEL_REWARDS))
+            if len(rewards) != count * struct.calcsize(ProximityPlayer.MODEL_REWARDS):
+                raise Exception(f"{filename} is not a valid model")
+
+        # Rebuild the expected reward dictionary
+        self.exp_reward = {}
+        map_rewards = struct.iter_unpack(ProximityPlayer.MODEL_REWARDS, rewards)
+        for i, dir_rewards in enumerate(map_rewards):
+            entry = self._add_map(maps[i * map_len:(i + 1) * map_len])
+            for dir in Position.DIRECTIONS:
+                self._set_reward(entry, dir, dir_rewards[dir])
+
+    def _add_map(self, map:bytes) -> list[Union[array, int, list[int]]]:
         """
         Add a map to the expected reward dictionary, assignign default values to
         all directions.
 
         Params
         - map: the map to add to the reward dictionary
+
+        Return
+        - the entry of the map (rewards, max reward, directions with max reward)
         """
-        self.exp_reward[map] = {}
-        for dir in Position.DIRECTIONS:
-            self.exp_reward[map][dir] = ProximityPlayer.REWARD_NONE
+        rewards = array('i', [ProximityPlayer.REWARD_NONE] * len(Position.DIRECTIONS))
+        entry = [rewards, ProximityPlayer.REWARD_NONE, list(Position.DIRECTIONS)]
+        self.exp_reward[map] = entry
+        return entry
 
-    def _history_to_samples(self, history:list[SnakeStatus]) -> list[tuple[tuple[int],int,int]]:
+    def _get_entry(self, map:bytes) -> list[Union[array, int, list[int]]]:
         """
-        Convert a game history into a sequence of samples. Each sample contains
-        the linearized version of the map, the direction of the move and the
-        reward associated with that move.
+        Get the entry of a map in the expected reward dictionary, adding it if
+        the map has never been seen.
 
         Params
-        - history: the history in the game as a sequence of statuses
+        - map: the map to look for
 
         Return
-        - the list of samples
+        - the entry of the map (rewards, max reward, directions with max reward)
         """
-        samples = []
-        for i in range(len(history) - 1):
-            curr_status = history[i]
-            next_status = history[i + 1]
-
-            proximity_map = self._retrieve_proximity_map(curr_status)
-            next_proximity_map = self._retrieve_proximity_map(next_status)
-            move = self._retrieve_movement(curr_status, next_status)
-            reward = self._retrieve_reward(curr_status, next_status)
-
-            samples.append((proximity_map, next_proximity_map, move, reward))
+        entry = self.exp_reward.get(map)
+        if entry is None:
+            entry = self._add_map(map)
+        return entry
 
-        return samples
+    def _set_reward(self, entry:list[Union[array, int, list[int]]], dir:int, reward:int) -> None:
+        """
+        Set the expected reward of a direction in the entry of a map, keeping
+        the maximum reward and the corresponding directions up to date.
 
-    def _retrieve_proximity_map(self, status:SnakeStatus) -> tuple[int]:
+        Params
+        - entry: the entry of the map whose reward is updated
+        - dir: the direction whose reward is updated
+        - reward: the new expected reward
+        """
+        rewards, max_reward, max_dirs = entry
+        rewards[dir] = reward
+        if reward > max_reward:
+            entry[1] = reward
+            entry[2] = [dir]
+        elif (reward == max_reward) != (dir in max_dirs):
+            entry[1] = max(rewards)
+            entry[2] = [d for d in Position.DIRECTIONS if rewards[d] == entry[1]]
+
+    def _retrieve_proximity_map(self, status:SnakeStatus) -> bytes:
         """
         Compute an encoding of the dangers nearby and the position of the apple.
 
@@ -156,16 +212,29 @@ class ProximityPlayer(TrainedPlayer):
         Return
         - the information as a monodimensional encoding
         """
-        proximity_map = []
-
-        # Danger in proximity
-        for dy in range(-self.radius, self.radius + 1):
-            for dx in range(-self.radius, self.radius + 1):
-                pos = Position(status.snake[-1].x + dx, status.snake[-1].y + dy)
-                if pos.is_out_of_bounds(status.bounds) or pos in status.snake:
-                    proximity_map.append(ProximityPlayer.MAP_DEATH)
-                else:
-                    proximity_map.append(ProximityPlayer.MAP_NONE)
+        radius = self.radius
+        head_x, head_y = status.snake[-1]
+        left, top, right, bottom = status.bounds
+        width = right - left + 1
+
+        # Rows and columns of the window that fall inside the board, the
+        # others are padded as dangerous
+        x_from = max(head_x - radius, left)
+        x_to = min(head_x + radius, right)
+        y_from = max(head_y - radius, bottom)
+        y_to = min(head_y + radius, top)
+        pad_left = self._dangers[x_from - head_x + radius]
+        pad_right = self._dangers[head_x + radius - x_to]
+
+        # Danger in proximity (the occupancy grid uses MAP_DEATH for the snake
+        # and MAP_NONE for free cells, so its rows can be copied as they are)
+        proximity_map = bytearray(self._danger_row * (y_from - head_y + radius))
+        for y in range(y_from, y_to + 1):
+            row = (y - bottom) * width - left
+            proximity_map += pad_left
+            proximity_map += status.grid[row + x_from:row + x_to + 1]
+            proximity_map += pad_right
+        proximity_map += self._danger_row * (head_y + radius - y_to)
 
         # Apple position
         a_dx = status.apple.x - status.snake[-1].x
@@ -178,10 +247,9 @@ class ProximityPlayer(TrainedPlayer):
             a_dy = self.radius + 1
         elif a_dy < - self.radius:
             a_dy = - self.radius - 1
-        proximity_map.append(a_dx)
-        proximity_map.append(a_dy)
+        proximity_map += struct.pack("bb", a_dx, a_dy)
 
-        return tuple(proximity_map)
+        return bytes(proximity_map)
 
     def _retrieve_movement(self, curr_status:SnakeStatus, next_status:SnakeStatus) -> int:
         """
@@ -200,15 +268,10 @@ class ProximityPlayer(TrainedPlayer):
         """
         curr_head = curr_status.snake[-1]
         next_head = next_status.snake[-1]
-        if curr_head.x > next_head.x:
-            return Position.LEFT
-        if curr_head.y < next_head.y:
-            return Position.UP
-        if curr_head.x < next_head.x:
-            return Position.RIGHT
-        if curr_head.y > next_head.y:
-            return Position.DOWN
-        raise Exception("Non-consecutive statuses")
+        shift = (next_head.x - curr_head.x, next_head.y - curr_head.y)
+        if shift not in ProximityPlayer.MOVES:
+            raise Exception("Non-consecutive statuses")
+        return ProximityPlayer.MOVES[shift]
 
     def _retrieve_reward(self, curr_status:SnakeStatus, next_status:SnakeStatus) -> int:
         """
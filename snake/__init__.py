@@ -15,6 +15,7 @@ def play_game(game:Snake, player:Player) -> list[SnakeStatus]:
     - the list of statuses of the whole game
     """
     history = []
+    player.reset(game.get_status())
     while not game.is_game_over():
         status = game.get_status()
         direction = player.compute_move(status)
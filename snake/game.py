@@ -1,14 +1,45 @@
 
-import copy
+from   collections import deque
 import random as r
-from   typing import Union
+from   typing import NamedTuple, Optional, Union
 
-class Position(object):
+def pack(x:int, y:int) -> int:
+    """
+    Pack a pair of non-negative coordinates into a single integer, so that it
+    can be hashed and compared cheaply.
+
+    Params
+    - x: the horizontal coordinate
+    - y: the vertical coordinate
+
+    Return
+    - the packed coordinates
+    """
+    return x | (y << 16)
+
+def unpack(packed:int) -> 'Position':
+    """
+    Rebuild the position from its packed coordinates (see pack).
+
+    Params
+    - packed: the packed coordinates
+
+    Return
+    - the corresponding position
+    """
+    return Position(packed & 0xFFFF, packed >> 16)
+
+class Position(NamedTuple):
     """
     Describe a bidimensional integer position. x-coordinate increases left to
     right, y-coordinate increases bottom to top (cartesian plane).
     """
 
+    x:int
+    """The horizontal coordinate"""
+    y:int
+    """The vertical coordinate"""
+
     LEFT = 0
     """Indicate the left direction."""
     UP = 1
@@ -19,42 +50,8 @@ class Position(object):
     """Indicate the downward direction"""
     DIRECTIONS = [LEFT, UP, RIGHT, DOWN]
     """The list of possible directions"""
-
-    def __init__(self, x:int, y:int) -> 'Position':
-        """
-        Create a new position, based on the coordinates.
-
-        Params
-        - x: the horizontal coordinate
-        - y: the vertical coordinate
-
-        Return
-        - the new position
-        """
-        self.x = x
-        self.y = y
-
-    def __eq__(self, other:'Position') -> bool:
-        """
-        Check if the positions are the same.
-
-        Params
-        - other: the other position to compare
-
-        Return
-        - true, if the positions are the same, false otherwise
-        """
-        return self.x == other.x and self.y == other.y
-
-    def __iter__(self) -> int:
-        """
-        Iterate over the two coordinates.
-        
-        Return
-        - the two coordinates, one after the other
-        """
-        yield self.x
-        yield self.y
+    SHIFTS = ((-1, 0), (0, 1), (1, 0), (0, -1))
+    """The horizontal and vertical shift of each direction, indexed by direction"""
 
     def __str__(self) -> str:
         """
@@ -83,15 +80,9 @@ class Position(object):
         Raise
         - Exception: if the direction is not valid
         """
-        # Check if the position is valid
-        if dir not in (Position.LEFT, Position.UP, Position.RIGHT, Position.DOWN):
+        if not 0 <= dir < len(Position.SHIFTS):
             raise Exception(f"{dir} is not a valid move")
-
-        # Compute movement
-        dx = 1 if dir == Position.RIGHT else (-1 if dir == Position.LEFT else 0)
-        dy = 1 if dir == Position.UP    else (-1 if dir == Position.DOWN else 0)
-
-        # Compute and return the next position
+        dx, dy = Position.SHIFTS[dir]
         return Position(self.x + dx, self.y + dy)
 
     def is_out_of_bounds(self, bounds:tuple[int,int,int,int]) -> bool:
@@ -106,7 +97,7 @@ class Position(object):
         - true, if the position is outside the specified bounds, false otherwise
         """
         left, top, right, bottom = bounds
-        return self.x < left or self.x > right or self.y < bottom or self.y > top
+        return not (left <= self.x <= right and bottom <= self.y <= top)
 
     def random_position(bounds:tuple[int,int,int,int], taboo:list['Position']=[], rand_tries:int=5):
         """
@@ -151,14 +142,17 @@ class Position(object):
 
 
 class SnakeStatus(object):
-    def __init__(self, bounds:tuple[int,int,int,int], snake:list[Position], apple:Position,
-            score:int, alive:bool, won:bool) -> 'SnakeStatus':
+    def __init__(self, bounds:tuple[int,int,int,int], snake:deque[Position], snake_set:set[int],
+            grid:bytearray, apple:Position, score:int, alive:bool, won:bool) -> 'SnakeStatus':
         """
         Create an object that represents the status of the snake game.
 
         Params
         - bounds: the bounds of the board (left, top, right, bottom)
         - snake: the snake position
+        - snake_set: the packed positions of the snake (see pack)
+        - grid: the occupancy of the board, row by row from the bottom (1 if
+            the cell is occupied by the snake, 0 otherwise)
         - apple: the apple position
         - score: the score
         - alive: the flag which indicates if the snake is alive
@@ -167,14 +161,18 @@ class SnakeStatus(object):
         Return
         - The new status
         """
-        self.bounds = copy.deepcopy(bounds)
-        self.snake  = copy.deepcopy(snake)
-        self.apple  = copy.deepcopy(apple)
-        self.score  = copy.deepcopy(score)
-        self.alive  = copy.deepcopy(alive)
-        self.won    = copy.deepcopy(won)
-
-    def __iter__(self) -> Union[tuple[int,int,int,int], list[Position],
+        # Positions, numbers and flags are immutable: only the containers
+        # need to be snapshotted
+        self.bounds = tuple(bounds)
+        self.snake  = tuple(snake)
+        self.snake_set = frozenset(snake_set)
+        self.grid   = bytes(grid)
+        self.apple  = apple
+        self.score  = score
+        self.alive  = alive
+        self.won    = won
+
+    def __iter__(self) -> Union[tuple[int,int,int,int], tuple[Position, ...],
             Position, int, bool, bool]:
         """
         Iterate over the elemements of the status, in order: bounds (left, top,
@@ -213,13 +211,14 @@ class Snake(object):
     Describe a game of snake.
     """
 
-    def __init__(self, width:int, height:int) -> 'Snake':
+    def __init__(self, width:int, height:int, seed:Optional[int]=None) -> 'Snake':
         """
         Create a new game of snake.
 
         Params
         - width: the width of the map (from 0 to width-1)
         - height: the height of the map (from 0 to height-1)
+        - seed: the seed of the random positions (random if not specified)
 
         Return
         - The new game of snake
@@ -227,8 +226,19 @@ class Snake(object):
         self.width  = width
         self.height = height
         self.bounds = (0, self.height - 1, self.width -1, 0)
-        self.snake  = [Position.random_position(self.bounds)]
-        self.apple  = Position.random_position(self.bounds, taboo=self.snake)
+        self._rng   = r.Random(seed)
+        self.snake  = deque()
+        self.snake_set = set()
+        self.grid   = bytearray(width * height)
+
+        # Free cells, with the index of each of them for constant time removal
+        self._free  = [pack(x, y) for y in range(height) for x in range(width)]
+        self._free_idx = {cell: i for i, cell in enumerate(self._free)}
+
+        head = self._random_free_position()
+        self.snake.append(head)
+        self._occupy(head)
+        self.apple  = self._random_free_position()
         self.score  = 0
         self.alive  = True
         self.win    = False
@@ -254,7 +264,7 @@ class Snake(object):
 
         # Get status info
         out_of_bounds = next_pos.is_out_of_bounds(self.bounds)
-        self_bite = next_pos in self.snake
+        self_bite = not out_of_bounds and pack(next_pos.x, next_pos.y) in self.snake_set
         apple_eaten = next_pos == self.apple
 
         # Check if the next position makes the player lose
@@ -266,6 +276,7 @@ class Snake(object):
 
             # The head always moves forward
             self.snake.append(next_pos)
+            self._occupy(next_pos)
 
             # If the apple is eaten: the tail does not move and the apple pos
             # become the head of the snake, then the apple respawn elsewhere
@@ -278,17 +289,57 @@ class Snake(object):
                     self.win = True
                     self.apple = Position(-1, -1)
                 else:
-                    self.apple = Position.random_position(self.bounds, taboo=self.snake)
+                    self.apple = self._random_free_position()
 
             # If no apple was eaten the length of the snake does not change
             # hence the tail moves forward too
             else:
-                self.snake.pop(0)
+                self._release(self.snake.popleft())
                 self.starving -= 1
 
         if self.starving == 0:
             self.alive = False
 
+    def _occupy(self, pos:Position) -> None:
+        """
+        Mark a free position as occupied by the snake.
+
+        Params
+        - pos: the position to occupy
+        """
+        cell = pack(pos.x, pos.y)
+        self.snake_set.add(cell)
+        self.grid[pos.y * self.width + pos.x] = 1
+
+        # Swap the cell with the last free one, then drop it
+        idx = self._free_idx.pop(cell)
+        last = self._free.pop()
+        if last != cell:
+            self._free[idx] = last
+            self._free_idx[last] = idx
+
+    def _release(self, pos:Position) -> None:
+        """
+        Mark a position occupied by the snake as free.
+
+        Params
+        - pos: the position to release
+        """
+        cell = pack(pos.x, pos.y)
+        self.snake_set.discard(cell)
+        self.grid[pos.y * self.width + pos.x] = 0
+        self._free_idx[cell] = len(self._free)
+        self._free.append(cell)
+
+    def _random_free_position(self) -> Position:
+        """
+        Pick randomly a position that is not occupied by the snake.
+
+        Return
+        - the randomly picked position
+        """
+        return unpack(self._rng.choice(self._free))
+
     def get_snake_head_position(self) -> Position:
         """
         Get the position of the head of the snake.
@@ -330,4 +381,5 @@ class Snake(object):
         Return
         - the status of the game
         """
-        return SnakeStatus(self.bounds, self.snake, self.apple, self.score, self.alive, self.win)
+        return SnakeStatus(self.bounds, self.snake, self.snake_set, self.grid,
+            self.apple, self.score, self.alive, self.win)
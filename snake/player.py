@@ -24,6 +24,18 @@ class Player(object):
         """
         raise NotImplementedError("This method must be override by a subclass")
 
+    def reset(self, status:SnakeStatus) -> None:
+        """
+        Prepare the player for a new game. It must be called with the initial
+        status before the first call to compute_move of every game (play_game
+        does it); players may fail or move wrongly otherwise. By default,
+        nothing is done.
+
+        Params
+        - status: the initial status of the game
+        """
+        pass
+
 class TrainedPlayer(Player):
     """
     Define the interface for a snake player that requires training.